@@ -4,24 +4,197 @@ Example fetcher functions for common data sources.
 These are examples - copy and modify for your own use.
 """
 
+import asyncio
+import hashlib
+import importlib
+import inspect
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial, wraps
+
+import numpy as np
 import pandas as pd
 
 
+_MODULES: dict = {}
+
+
+def _lazy_import(name: str):
+    """
+    Import an optional dependency on first use and keep it for later calls.
+
+    Users only need the packages for the fetchers they actually call.
+    """
+    module = _MODULES.get(name)
+    if module is None:
+        module = _MODULES[name] = importlib.import_module(name)
+    return module
+
+
+_TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_ttl(ttl) -> float:
+    """Convert a TTL like "1h", "24h" or "90d" (or plain seconds) to seconds."""
+    if isinstance(ttl, (int, float)):
+        return float(ttl)
+    return float(ttl[:-1]) * _TTL_UNITS[ttl[-1]]
+
+
+# Closure values simple enough to repr the same way in every process
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+
+def _fetcher_identity(fetch_fn) -> tuple:
+    """
+    Describe a fetcher for cache keys: its name plus the simple values it
+    was configured with (data_dir, api keys, partial arguments), so two
+    fetchers built by the same factory don't share entries.
+    """
+    if isinstance(fetch_fn, partial):
+        keywords = tuple(sorted(fetch_fn.keywords.items()))
+        return (_fetcher_identity(fetch_fn.func), fetch_fn.args, keywords)
+
+    name = getattr(fetch_fn, "__qualname__", None) or type(fetch_fn).__qualname__
+    return (getattr(fetch_fn, "__module__", None), name, _closure_config(fetch_fn))
+
+
+def _closure_config(fn, seen=None) -> tuple:
+    """Simple values closed over by fn, including through nested helpers."""
+    seen = set() if seen is None else seen
+    seen.add(id(fn))
+    config = []
+    for cell in getattr(fn, "__closure__", None) or ():
+        value = cell.cell_contents
+        if isinstance(value, _KEY_TYPES):
+            config.append(value)
+        elif inspect.isfunction(value) and id(value) not in seen:
+            config.extend(_closure_config(value, seen))
+    return tuple(config)
+
+
+def cached_fetcher(
+    fetch_fn, ttl="24h", path: str = "~/.stockprep/cache", namespace: str | None = None
+):
+    """
+    Wrap a fetcher with a Parquet-backed on-disk cache.
+
+    pip install pyarrow
+
+    Each symbol is stored in its own file, keyed by an md5 of
+    (fetcher, symbol, start, end), so a request for ["AAPL", "MSFT"]
+    after one for ["AAPL"] only hits the network for MSFT. Entries older
+    than `ttl` are refetched - use "1h" for intraday, "24h" for daily
+    history, "90d" for fundamentals.
+
+    The fetcher part of the key is its name plus the strings/numbers its
+    factory closed over (e.g. data_dir or api_key). Pass `namespace` to
+    set it explicitly, e.g. for callable objects whose configuration
+    lives in attributes.
+
+    Usage:
+        fetcher = cached_fetcher(tiingo_fetcher("your_api_key"), ttl="24h")
+        data = StockData(fetcher)
+    """
+    cache_dir = os.path.expanduser(path)
+    max_age = _parse_ttl(ttl)
+    identity = namespace if namespace is not None else _fetcher_identity(fetch_fn)
+
+    def cache_path(symbol: str, start: str, end: str) -> str:
+        key = repr((identity, (symbol,), start, end)).encode()
+        return os.path.join(cache_dir, hashlib.md5(key).hexdigest() + ".parquet")
+
+    def read_fresh(file: str) -> pd.DataFrame | None:
+        pa = _lazy_import("pyarrow")
+        pq = _lazy_import("pyarrow.parquet")
+
+        if not os.path.exists(file):
+            return None
+        try:
+            meta = pq.read_metadata(file).metadata or {}
+            fetched_at = float(meta.get(b"fetched_at", 0))
+            if time.time() - fetched_at > max_age:
+                return None
+            return pq.read_table(file).to_pandas()
+        except (OSError, ValueError, pa.ArrowException):
+            # Unreadable (e.g. left over from an old partial write): refetch
+            return None
+
+    def write(df: pd.DataFrame, file: str):
+        pa = _lazy_import("pyarrow")
+        pq = _lazy_import("pyarrow.parquet")
+
+        table = pa.Table.from_pandas(df)
+        meta = dict(table.schema.metadata or {})
+        meta[b"fetched_at"] = str(time.time()).encode()
+
+        # Write beside the target and rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(table.replace_schema_metadata(meta), tmp, compression="zstd")
+            os.replace(tmp, file)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    @wraps(fetch_fn)
+    def fetch(symbols: list, start: str, end: str) -> pd.DataFrame:
+        os.makedirs(cache_dir, exist_ok=True)
+
+        hits = {}
+        for symbol in symbols:
+            df = read_fresh(cache_path(symbol, start, end))
+            if df is not None:
+                hits[symbol] = df
+
+        # Only the symbols missing from the cache go to the source
+        missing = [s for s in symbols if s not in hits]
+        if missing:
+            fetched = fetch_fn(missing, start, end)
+            for symbol in missing:
+                if symbol in fetched.columns:
+                    # Drop rows that only other symbols had data for, so a
+                    # later hit returns the same rows as a direct fetch
+                    hits[symbol] = fetched[[symbol]].dropna(how="all")
+                    write(hits[symbol], cache_path(symbol, start, end))
+
+        frames = [hits[s] for s in symbols if s in hits]
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    # wraps() copies the wrapped fetcher's attributes; a streaming fetch_iter
+    # would bypass the cache, so don't expose it
+    fetch.__dict__.pop("fetch_iter", None)
+
+    return fetch
+
+
 def yfinance_fetcher(symbols: list, start: str, end: str) -> pd.DataFrame:
     """
     Fetch from Yahoo Finance using yfinance.
 
     pip install yfinance
     """
-    import yfinance as yf
+    yf = _lazy_import("yfinance")
+
+    # auto_adjust=False keeps the "Adj Close" column; threads fans out per symbol
+    raw = yf.download(
+        symbols, start=start, end=end, progress=False, auto_adjust=False, threads=True
+    )
+
+    # (field, ticker) columns: take the Adj Close level as a view
+    if isinstance(raw.columns, pd.MultiIndex):
+        return raw.xs("Adj Close", level=0, axis=1)
 
-    df = yf.download(symbols, start=start, end=end, progress=False)["Adj Close"]
+    # Older yfinance returns flat columns for a single symbol
+    adj = raw["Adj Close"]
+    return pd.DataFrame({symbols[0]: adj.values}, index=adj.index, copy=False)
 
-    # Single symbol returns Series, convert to DataFrame
-    if isinstance(df, pd.Series):
-        df = df.to_frame(symbols[0])
 
-    return df
+# Daily history rarely changes, so serve repeat calls from disk for a day
+yfinance_fetcher = cached_fetcher(yfinance_fetcher, ttl="24h")
 
 
 def csv_fetcher(data_dir: str = "data"):
@@ -30,28 +203,60 @@ def csv_fetcher(data_dir: str = "data"):
 
     Expects files like: data/AAPL.csv with 'Date' and 'Adj Close' columns.
 
+    pip install pyarrow
+
     Usage:
         fetcher = csv_fetcher("./my_data")
         data = StockData(fetcher)
     """
+    def _read_one(symbol: str) -> pd.Series:
+        pa = _lazy_import("pyarrow")
+        csv = _lazy_import("pyarrow.csv")
+
+        path = f"{data_dir}/{symbol}.csv"
+        table = csv.read_csv(
+            path,
+            read_options=csv.ReadOptions(block_size=1 << 20),
+            convert_options=csv.ConvertOptions(
+                include_columns=["Date", "Adj Close"],
+                column_types={"Adj Close": pa.float32(), "Date": pa.timestamp("ns")},
+            ),
+        )
+        temp = table.to_pandas(zero_copy_only=False).set_index("Date")
+        temp.index.name = None
+        return temp["Adj Close"].rename(symbol)
+
     def fetch(symbols: list, start: str, end: str) -> pd.DataFrame:
         dates = pd.date_range(start, end)
-        df = pd.DataFrame(index=dates)
+        if not symbols:
+            return pd.DataFrame(index=dates[:0])
 
-        for symbol in symbols:
-            path = f"{data_dir}/{symbol}.csv"
-            temp = pd.read_csv(
-                path,
-                index_col="Date",
-                parse_dates=True,
-                usecols=["Date", "Adj Close"],
-                na_values=["nan"],
-            )
-            temp = temp.rename(columns={"Adj Close": symbol})
-            df = df.join(temp)
+        # Allocate the output once and fill each symbol's column in place
+        arr = np.full((len(dates), len(symbols)), np.nan, dtype=np.float32)
+
+        # Parsing releases the GIL, so files are read in parallel
+        with ThreadPoolExecutor(max_workers=min(32, len(symbols))) as pool:
+            for col, series in enumerate(pool.map(_read_one, symbols)):
+                rows = dates.get_indexer(series.index)
+                keep = rows >= 0
+                arr[rows[keep], col] = series.to_numpy()[keep]
+
+        df = pd.DataFrame(arr, index=dates, columns=symbols, copy=False)
 
         return df.dropna(how="all")
 
+    def fetch_iter(symbols: list, start: str, end: str):
+        """Yield (symbol, Series) pairs as each file finishes parsing."""
+        if not symbols:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(32, len(symbols))) as pool:
+            futures = {pool.submit(_read_one, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    fetch.fetch_iter = fetch_iter
+
     return fetch
 
 
@@ -66,16 +271,17 @@ def alpaca_fetcher(api_key: str, secret_key: str):
         data = StockData(fetcher)
     """
     def fetch(symbols: list, start: str, end: str) -> pd.DataFrame:
-        from alpaca.data.historical import StockHistoricalDataClient
-        from alpaca.data.requests import StockBarsRequest
-        from alpaca.data.timeframe import TimeFrame
         from datetime import datetime
 
-        client = StockHistoricalDataClient(api_key, secret_key)
+        historical = _lazy_import("alpaca.data.historical")
+        requests = _lazy_import("alpaca.data.requests")
+        timeframe = _lazy_import("alpaca.data.timeframe")
+
+        client = historical.StockHistoricalDataClient(api_key, secret_key)
 
-        request = StockBarsRequest(
+        request = requests.StockBarsRequest(
             symbol_or_symbols=symbols,
-            timeframe=TimeFrame.Day,
+            timeframe=timeframe.TimeFrame.Day,
             start=datetime.fromisoformat(start),
             end=datetime.fromisoformat(end),
         )
@@ -105,7 +311,7 @@ def nasdaqdatalink_fetcher(api_key: str):
         data = StockData(fetcher)
     """
     def fetch(symbols: list, start: str, end: str) -> pd.DataFrame:
-        import nasdaqdatalink
+        nasdaqdatalink = _lazy_import("nasdaqdatalink")
 
         nasdaqdatalink.ApiConfig.api_key = api_key
 
@@ -117,51 +323,95 @@ def nasdaqdatalink_fetcher(api_key: str):
             paginate=True,
         )
 
-        # Pivot to standard format
-        df = df.pivot(index="date", columns="ticker", values="closeadj")
-        df.index = pd.to_datetime(df.index)
+        # The client usually returns datetime64 already; only parse if not
+        if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+            df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", cache=True)
+
+        # Pivot to standard format; categorical tickers let unstack reshape
+        # on integer codes. Categories come from the returned tickers, so
+        # spellings that differ from `symbols` are kept; columns are sorted
+        df["ticker"] = pd.Categorical(df["ticker"])
+        df = df.set_index(["date", "ticker"])["closeadj"].unstack("ticker")
+        df.columns = df.columns.astype(object)
 
         return df
 
     return fetch
 
 
-def tiingo_fetcher(api_key: str):
+def tiingo_fetcher(api_key: str, max_rate: float = 10):
     """
     Factory that returns a fetcher for Tiingo.
 
     SURVIVORSHIP BIAS FREE - includes delisted stocks.
 
-    pip install requests
+    pip install "httpx[http2]" aiolimiter
+    pip install orjson  # optional, faster JSON parsing
 
     Free tier available at tiingo.com
 
+    Symbols are requested concurrently, throttled to `max_rate`
+    requests per second. Safe to call from a running event loop (e.g. a
+    Jupyter cell); the requests then run on a worker thread.
+
     Usage:
         fetcher = tiingo_fetcher("your_api_key")
         data = StockData(fetcher)
     """
-    def fetch(symbols: list, start: str, end: str) -> pd.DataFrame:
-        import requests
-
-        frames = []
-        for symbol in symbols:
+    async def fetch_all(symbols: list, start: str, end: str) -> list:
+        httpx = _lazy_import("httpx")
+        aiolimiter = _lazy_import("aiolimiter")
+
+        try:
+            from orjson import loads
+        except ImportError:
+            from json import loads
+
+        limiter = aiolimiter.AsyncLimiter(max_rate=max_rate, time_period=1)
+        params = {
+            "startDate": start,
+            "endDate": end,
+            "token": api_key,
+        }
+
+        async def fetch_one(client, symbol: str):
             url = f"https://api.tiingo.com/tiingo/daily/{symbol}/prices"
-            params = {
-                "startDate": start,
-                "endDate": end,
-                "token": api_key,
-            }
-            resp = requests.get(url, params=params)
+            # Acquire per request, not per batch, so the rate is actually enforced
+            async with limiter:
+                resp = await client.get(url, params=params)
             resp.raise_for_status()
+            data = loads(resp.content)
 
-            data = resp.json()
             if data:
-                df = pd.DataFrame(data)
-                df["date"] = pd.to_datetime(df["date"]).dt.tz_localize(None)
+                df = pd.DataFrame.from_records(data, columns=["date", "adjClose"])
+                df = df.astype({"adjClose": "float64"})
+                # Dates come as "YYYY-MM-DDT00:00:00.000Z"; daily bars only need the day
+                df["date"] = pd.to_datetime(
+                    df["date"].str[:10], format="%Y-%m-%d", cache=True
+                )
                 df = df.set_index("date")[["adjClose"]]
-                df = df.rename(columns={"adjClose": symbol})
-                frames.append(df)
+                return df.rename(columns={"adjClose": symbol})
+
+        # One client for the whole batch: TLS is negotiated once and
+        # HTTP/2 multiplexes the requests over it
+        limits = httpx.Limits(max_connections=10, max_keepalive_connections=10)
+        async with httpx.AsyncClient(http2=True, timeout=30, limits=limits) as client:
+            return await asyncio.gather(*[fetch_one(client, s) for s in symbols])
+
+    def fetch(symbols: list, start: str, end: str) -> pd.DataFrame:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            results = asyncio.run(fetch_all(symbols, start, end))
+        else:
+            # Already inside an event loop (e.g. Jupyter), where asyncio.run
+            # raises - run ours on a worker thread instead
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                future = pool.submit(asyncio.run, fetch_all(symbols, start, end))
+                results = future.result()
+
+        frames = [df for df in results if df is not None]
 
         return pd.concat(frames, axis=1) if frames else pd.DataFrame()
 
-    return fetch
\ No newline at end of file
+    return fetch
@@ -4,8 +4,14 @@ stockprep - Source-agnostic stock data preparation utilities.
 Bring your own fetcher, get normalized/cleaned price data.
 """
 
+import hashlib
+import os
+import tempfile
+
+import numpy as np
 import pandas as pd
-from typing import Callable, Protocol
+from functools import wraps
+from typing import Callable, Iterable, Protocol
 
 
 class DataProvider(Protocol):
@@ -13,9 +19,90 @@ class DataProvider(Protocol):
     def __call__(self, symbols: list, start: str, end: str) -> pd.DataFrame: ...
 
 
+class StreamingDataProvider(DataProvider, Protocol):
+    """
+    A DataProvider that can also yield (symbol, Series) pairs as each
+    symbol arrives, letting load() clean columns while others download.
+    """
+    def fetch_iter(
+        self, symbols: list, start: str, end: str
+    ) -> Iterable[tuple[str, pd.Series]]: ...
+
+
 FetchFn = Callable[[list, str, str], pd.DataFrame]
 
 
+def _memoize_on_prices(method):
+    """Cache a method's result until self.prices is replaced."""
+    @wraps(method)
+    def wrapper(self):
+        hit = self._memo.get(method.__name__)
+        # Keep a reference to the prices object, not its id, so a new frame
+        # reusing a freed address can't return a stale result
+        if hit is not None and hit[0] is self.prices:
+            return hit[1]
+        result = method(self)
+        self._memo[method.__name__] = (self.prices, result)
+        return result
+
+    return wrapper
+
+
+_fused_prep = None
+
+
+def _get_fused_prep():
+    """Import numba and compile the fused kernel on first use."""
+    global _fused_prep
+    if _fused_prep is None:
+        from numba import njit, prange
+
+        # fastmath without "nnan"/"ninf": the kernel relies on NaN comparisons
+        @njit(
+            parallel=True,
+            fastmath={"nsz", "arcp", "contract", "afn", "reassoc"},
+            cache=True,
+        )
+        def kernel(a):
+            """
+            ffill + bfill, normalize and daily returns in one sweep per column.
+
+            Returns (filled, normalized, returns) with the same meaning as
+            prices, normalize() and daily_returns().
+            """
+            n, k = a.shape
+            filled = np.empty_like(a)
+            norm = np.empty_like(a)
+            ret = np.empty((max(n - 1, 0), k), dtype=a.dtype)
+
+            for j in prange(k):
+                # Forward scan: carry the last valid value, remember the first one
+                first = -1
+                last = np.nan
+                for i in range(n):
+                    v = a[i, j]
+                    if v == v:
+                        last = v
+                        if first < 0:
+                            first = i
+                    filled[i, j] = last
+
+                # Second scan: backfill leading gaps, then derive both outputs
+                base = a[first, j] if first >= 0 else np.nan
+                for i in range(n):
+                    if i < first:
+                        filled[i, j] = base
+                    v = filled[i, j]
+                    norm[i, j] = v / base
+                    if i > 0:
+                        ret[i - 1, j] = v / filled[i - 1, j] - 1.0
+
+            return filled, norm, ret
+
+        _fused_prep = kernel
+    return _fused_prep
+
+
 class StockData:
     """
     Source-agnostic stock data container with common prep operations.
@@ -30,37 +117,186 @@ class StockData:
 
         normalized = data.normalize()
         returns = data.daily_returns()
+
+    Prices are stored as float32 by default, which halves memory traffic
+    and keeps ~7 significant digits - plenty for prices and returns, but
+    pass dtype="float64" if you need double precision downstream.
+
+    Pass cache_dir to keep fetched data on disk as Parquet (needs pyarrow),
+    so re-running a script skips the download. Use one cache_dir per data
+    source - entries are keyed by symbols and dates only.
+
+    normalize(), daily_returns() and cumulative_returns() are computed once
+    per load() and the same DataFrame is returned on repeat calls - copy it
+    before modifying.
+
+    Pass fused=True (needs numba) to have load() clean the data and compute
+    normalize() and daily_returns() in a single compiled pass. It only pays
+    off on large universes: importing numba and compiling the kernel cost
+    far more than the numpy path on a few thousand rows.
+
+    If the fetcher has a fetch_iter attribute (see StreamingDataProvider),
+    load() consumes it instead and cleans each symbol as it arrives, unless
+    cache_dir or fused is set. Each Series is placed on the calendar-day
+    grid from start to end, and days with no data for any symbol are
+    dropped, so this suits daily data.
     """
 
-    def __init__(self, fetch: FetchFn):
+    def __init__(
+        self,
+        fetch: FetchFn,
+        dtype: str = "float32",
+        cache_dir: str | None = None,
+        fused: bool = False,
+    ):
         self.fetch = fetch
+        self.dtype = dtype
+        self.cache_dir = cache_dir
+        self.fused = fused
         self.raw: pd.DataFrame | None = None
         self.prices: pd.DataFrame | None = None
+        self._memo: dict = {}
 
     def load(self, symbols: list, start: str, end: str) -> "StockData":
         """Fetch and clean price data."""
-        self.raw = self.fetch(symbols, start, end)
-        self.prices = self._clean(self.raw)
+        self._reset_cache()
+        fetch_iter = getattr(self.fetch, "fetch_iter", None)
+        if fetch_iter is not None and self.cache_dir is None and not self.fused:
+            self._stream_load(fetch_iter, symbols, start, end)
+            return self
+
+        self.raw = self._fetch_raw(symbols, start, end)
+        if self.fused and not self.raw.empty:
+            self._fused_load()
+        else:
+            self.prices = self._clean(self.raw)
         return self
 
+    def _stream_load(self, fetch_iter, symbols: list, start: str, end: str):
+        """Fill pre-allocated raw/price arrays one symbol at a time."""
+        dates = pd.date_range(start, end)
+        # A repeated symbol is fetched once and copied into each of its columns
+        cols_of: dict[str, list[int]] = {}
+        for i, symbol in enumerate(symbols):
+            cols_of.setdefault(symbol, []).append(i)
+        raw = np.full((len(dates), len(symbols)), np.nan, dtype=self.dtype)
+        prices = np.full_like(raw, np.nan)
+
+        for symbol, series in fetch_iter(list(cols_of), start, end):
+            col, *copies = cols_of[symbol]
+            rows = dates.get_indexer(series.index)
+            keep = rows >= 0
+            raw[rows[keep], col] = series.to_numpy()[keep]
+            prices[:, col] = pd.Series(raw[:, col]).ffill().bfill().to_numpy()
+            for other in copies:
+                raw[:, other] = raw[:, col]
+                prices[:, other] = prices[:, col]
+
+        # Filling before dropping empty days gives the same values as after
+        has_data = ~np.isnan(raw).all(axis=1)
+        index = dates[has_data]
+        self.raw = pd.DataFrame(raw[has_data], index=index, columns=symbols, copy=False)
+        self.prices = pd.DataFrame(
+            prices[has_data], index=index, columns=symbols, copy=False
+        )
+
+    def _fused_load(self):
+        """Clean self.raw with the numba kernel and seed the result caches."""
+        fused_prep = _get_fused_prep()
+        filled, norm, ret = fused_prep(self.raw.to_numpy(dtype=self.dtype))
+        index, columns = self.raw.index, self.raw.columns
+
+        self.prices = pd.DataFrame(filled, index=index, columns=columns, copy=False)
+        self._memo["_normalized_array"] = (self.prices, norm)
+        self._memo["normalize"] = (
+            self.prices, pd.DataFrame(norm, index=index, columns=columns, copy=False)
+        )
+        self._memo["daily_returns"] = (
+            self.prices,
+            pd.DataFrame(ret, index=index[1:], columns=columns, copy=False),
+        )
+
+    def _fetch_raw(self, symbols: list, start: str, end: str) -> pd.DataFrame:
+        """Call the fetcher, going through the Parquet cache if cache_dir is set."""
+        if self.cache_dir is None:
+            return self.fetch(symbols, start, end)
+
+        key = hashlib.blake2b(f"{','.join(sorted(symbols))}|{start}|{end}".encode())
+        path = os.path.join(self.cache_dir, f"{key.hexdigest()[:16]}.parquet")
+        if os.path.exists(path):
+            try:
+                df = pd.read_parquet(path, engine="pyarrow")
+            except (OSError, ValueError):
+                pass  # unreadable entry: refetch and overwrite it below
+            else:
+                # The key ignores order, so match the columns to this request
+                return df.reindex(columns=[s for s in symbols if s in df.columns])
+
+        df = self.fetch(symbols, start, end)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Parquet rejects repeated column names; the read path re-expands them.
+        # Write beside the target and rename, so readers never see a partial file
+        unique = df.loc[:, ~df.columns.duplicated()]
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            unique.to_parquet(
+                tmp, engine="pyarrow", compression="zstd", compression_level=3
+            )
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        return df
+
+    def _reset_cache(self):
+        """Drop values derived from the previous prices."""
+        self._memo.clear()
+
     def _clean(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Forward fill then backward fill missing values."""
-        return df.ffill().bfill()
+        """Forward fill then backward fill missing values, cast to self.dtype."""
+        return df.astype(self.dtype).ffill().bfill()
+
+    @_memoize_on_prices
+    def _normalized_array(self) -> np.ndarray:
+        """prices / first row, shared by normalize() and cumulative_returns()."""
+        a = self.prices.to_numpy()
+        return a / a[0]
 
+    @_memoize_on_prices
     def normalize(self) -> pd.DataFrame:
         """Normalize prices so all start at 1.0."""
         if self.prices is None:
             raise ValueError("No data loaded. Call load() first.")
-        return self.prices / self.prices.iloc[0]
+        return pd.DataFrame(
+            self._normalized_array(),
+            index=self.prices.index,
+            columns=self.prices.columns,
+            copy=False,
+        )
 
+    @_memoize_on_prices
     def daily_returns(self) -> pd.DataFrame:
         """Calculate daily percentage returns."""
         if self.prices is None:
             raise ValueError("No data loaded. Call load() first.")
-        return self.prices.pct_change().iloc[1:]
+        a = self.prices.to_numpy()
+        return pd.DataFrame(
+            a[1:] / a[:-1] - 1.0,
+            index=self.prices.index[1:],
+            columns=self.prices.columns,
+            copy=False,
+        )
 
+    @_memoize_on_prices
     def cumulative_returns(self) -> pd.DataFrame:
         """Calculate cumulative returns from start."""
         if self.prices is None:
             raise ValueError("No data loaded. Call load() first.")
-        return (self.prices / self.prices.iloc[0]) - 1
+        return pd.DataFrame(
+            self._normalized_array() - 1,
+            index=self.prices.index,
+            columns=self.prices.columns,
+            copy=False,
+        )